@@ -1,9 +1,10 @@
 import os
 import sys
 
-# Apuntar a la raíz del código fuente y al paquete específico
-sys.path.insert(0, os.path.abspath('../../src'))
-sys.path.insert(0, os.path.abspath('../../src/labterial'))
+# Apuntar a la raíz del código fuente (una sola entrada; los módulos se documentan como labterial.*)
+SRC_DIR = os.path.abspath('../../src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
 
 project = 'Labterial'
 copyright = '2025, Equipo de Ingeniería'
@@ -1,21 +1,31 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+import csv
 import os
 import sys
 
-# --- SETUP DE ENTORNO ---
-current_dir = os.path.dirname(os.path.abspath(__file__))
-if current_dir not in sys.path:
-    sys.path.insert(0, current_dir)
-
 try:
-    from .database_mgr import get_all_materials, insert_from_dataframe
-    from .physics import simular_ensayo
+    # Lector CSV multihilo (pyarrow es dependencia de Streamlit; se tolera su ausencia)
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
 except ImportError:
-    from database_mgr import get_all_materials, insert_from_dataframe
-    from physics import simular_ensayo
+    pa_csv = None
+
+# --- SETUP DE ENTORNO ---
+# ``streamlit run app.py`` ejecuta el archivo como script (sin paquete): en ese caso se
+# agrega su carpeta al path y se importan los módulos hermanos directamente.
+if __package__:
+    from .database_mgr import CSV_DTYPES, export_db_bytes, get_all_materials, get_categories, get_db_mtime, get_materials_by_category, insert_from_dataframe
+    from .physics import coeficiente_poisson, resistencia_ultima, simular_curva
+else:
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    if current_dir not in sys.path:
+        sys.path.insert(0, current_dir)
+    from database_mgr import CSV_DTYPES, export_db_bytes, get_all_materials, get_categories, get_db_mtime, get_materials_by_category, insert_from_dataframe
+    from physics import coeficiente_poisson, resistencia_ultima, simular_curva
 
 MPA_TO_KSI = 0.1450377
 
@@ -26,18 +36,6 @@ LABEL_MAP = {
     "density": "Densidad", "cost": "Costo", "max_temp": "Temp. Máx"
 }
 
-def translate_df(df):
-    """
-    Renombra las columnas del DataFrame técnico a nombres legibles para el usuario.
-    
-    Args:
-        df (pd.DataFrame): DataFrame con columnas en snake_case (ej. ``yield_strength``).
-        
-    Returns:
-        pd.DataFrame: DataFrame con columnas en Español (ej. ``Límite Elástico (Sy)``).
-    """
-    return df.rename(columns=LABEL_MAP)
-
 def configure_page():
     """
     Configura los metadatos iniciales de la aplicación Streamlit.
@@ -48,11 +46,190 @@ def configure_page():
     st.set_page_config(page_title="Labterial Edu", layout="wide", page_icon="🧪")
     st.title("🧪 Labterial: Suite de Ingeniería")
 
-def load_data():
-    """Wrapper simple para cargar datos desde el gestor de base de datos."""
+@st.cache_data(show_spinner=False)
+def load_data(db_mtime, categories=None):
+    """
+    Carga los materiales desde el gestor de base de datos, con caché entre re-ejecuciones.
+
+    Args:
+        db_mtime (float): Fecha de modificación del archivo SQLite (:func:`get_db_mtime`).
+            Solo se usa como clave de caché: si la base cambia, se vuelve a consultar.
+        categories (tuple, optional): Si se indica, filtra en SQL por estas categorías.
+    """
+    if categories: return get_materials_by_category(categories)
     return get_all_materials()
 
-def render_sidebar(df_raw):
+@st.cache_resource(show_spinner=False, max_entries=8)
+def load_index(db_mtime, categories=None):
+    """
+    Lista de nombres e índice ``nombre -> propiedades`` de los materiales cargados.
+
+    Se calculan una vez por versión de la base y filtro (no en cada rerun) y se comparten
+    entre widgets. Como ``name`` es UNIQUE en la base, la columna ya no tiene repetidos y no
+    hace falta ``unique()``.
+
+    Args:
+        db_mtime (float): Fecha de modificación de la base (clave de caché).
+        categories (tuple, optional): Mismo filtro que :func:`load_data`.
+
+    Returns:
+        tuple:
+            *   **names** (list): Nombres de los materiales, en el orden de :func:`load_data`.
+            *   **mats_by_name** (dict): Propiedades de cada material (dict plano), para
+                búsquedas O(1) en lugar de una máscara por material.
+    """
+    df = load_data(db_mtime, categories)
+    names = df['name'].tolist() if 'name' in df.columns else []
+    return names, (df.set_index('name', drop=False).to_dict('index') if names else {})
+
+@st.cache_data(show_spinner=False)
+def load_categories(db_mtime):
+    """Categorías disponibles (:func:`get_categories`), cacheadas por fecha de modificación de la base."""
+    return get_categories()
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def load_db_bytes(db_mtime):
+    """
+    Genera la copia de la base de datos para el botón de backup (:func:`export_db_bytes`).
+
+    Se usa ``st.cache_resource`` (y no ``cache_data``) porque ``bytes`` es inmutable: cada rerun
+    recibe el mismo objeto, sin la copia que ``cache_data`` haría al deserializar, y el botón de
+    descarga recibe siempre un objeto estable.
+
+    Args:
+        db_mtime (float): Fecha de modificación de la base (:func:`get_db_mtime`); solo actúa
+            como clave de caché, de modo que la copia se regenera únicamente cuando la base cambia.
+
+    Returns:
+        bytes: Contenido del archivo ``materials.db``.
+    """
+    return export_db_bytes()
+
+@st.cache_data(show_spinner=False, max_entries=512)
+def simulate_cached(modo, limit, props_items):
+    """
+    Ejecuta :func:`simular_curva` con caché entre re-ejecuciones.
+
+    La curva solo depende de las propiedades del material, el ensayo y el límite de la
+    máquina: cambiar las unidades, la geometría de flexión o el selector de benchmarking
+    reutiliza el resultado. Como la clave son las propiedades (y no la fecha de la base),
+    importar materiales nuevos no invalida las curvas ya calculadas.
+
+    Args:
+        modo (str): Tipo de ensayo.
+        limit (float): Límite del eje X definido por el slider.
+        props_items (tuple): Pares ``(propiedad, valor)`` ordenados del material
+            (``tuple(sorted(props.items()))``), hashables para la clave de caché.
+
+    Returns:
+        Curva: Arrays de NumPy devueltos por :func:`simular_curva` (sin DataFrame intermedio).
+    """
+    return simular_curva(dict(props_items), modo, max_strain_machine=limit)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def build_export_csv(export_key, _curves, x_title, y_title):
+    """
+    Serializa las curvas simuladas a CSV para el botón de descarga, con caché entre reruns.
+
+    ``to_csv`` formatea celda por celda y domina el costo cuando hay varias curvas; así solo
+    se repite cuando cambia lo que se grafica.
+
+    Args:
+        export_key (tuple): Materiales, ensayo, límite, unidades, geometría y ``db_mtime``;
+            identifican por completo el contenido exportado y actúan como clave de caché.
+        _curves (list): Tuplas ``(nombre, x, y)`` por material (no se incluyen en la clave).
+        x_title (str): Encabezado de la columna X.
+        y_title (str): Encabezado de la columna Y.
+
+    Returns:
+        bytes: CSV codificado en UTF-8.
+    """
+    # Un solo DataFrame a partir de columnas concatenadas (sin un DataFrame por material + concat)
+    names, xs, ys = zip(*_curves)
+    df_exp = pd.DataFrame({
+        x_title: np.concatenate(xs), y_title: np.concatenate(ys),
+        'Material': np.repeat(names, [len(x) for x in xs])
+    })
+    return df_exp.to_csv(index=False).encode('utf-8')
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def build_curves_figure(fig_key, _curves, title, x_title, y_title, x_range=None):
+    """
+    Construye la figura Plotly de las curvas, reutilizando la misma instancia entre reruns.
+
+    Armar un ``go.Figure`` (validación de cada traza y del layout) es costoso en Python; con
+    ``st.cache_resource`` se hace una sola vez por combinación de parámetros. ``st.plotly_chart``
+    no modifica la figura, por lo que compartirla es seguro.
+
+    Args:
+        fig_key (tuple): Misma clave que :func:`build_export_csv`; identifica las curvas.
+        _curves (list): Tuplas ``(nombre, x, y)`` por material (no se incluyen en la clave).
+        title (str): Título de la gráfica.
+        x_title (str): Etiqueta del eje X.
+        y_title (str): Etiqueta del eje Y.
+        x_range (list, optional): Rango fijo del eje X ``[min, max]``.
+
+    Returns:
+        go.Figure: Figura lista para ``st.plotly_chart``.
+    """
+    # Trazas y layout como dicts en un único constructor: se validan una sola vez,
+    # en lugar de un go.Scatter + add_trace por material. ``scattergl`` dibuja con WebGL,
+    # de modo que el render y el hover escalan con los puntos y no con el SVG de cada curva.
+    traces = [dict(type='scattergl', x=x_vals, y=y_vals, mode='lines', name=name, line=dict(width=3))
+              for name, x_vals, y_vals in _curves]
+    layout = dict(title=title, xaxis=dict(title=x_title), yaxis=dict(title=y_title),
+                  hovermode="x unified", template="plotly_white")
+    if x_range is not None: layout['xaxis']['range'] = x_range
+    return go.Figure(data=traces, layout=layout)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def build_report_exports(df):
+    """
+    Serializa la tabla de reportes a CSV y LaTeX, con caché entre reruns.
+
+    Args:
+        df (pd.DataFrame): Tabla filtrada por el usuario (su contenido es la clave de caché).
+
+    Returns:
+        tuple: ``(csv_bytes, latex_str)``.
+    """
+    return df.to_csv(index=False).encode('utf-8'), df.to_latex(index=False, float_format="%.2f")
+
+def read_import_csv(up):
+    """
+    Lee el CSV de importación con las columnas del esquema ya tipadas (:data:`CSV_DTYPES`).
+
+    Solo se leen las columnas del esquema presentes en la cabecera, y cada una se convierte
+    directamente al tipo declarado (los nombres quedan como texto: ``007`` no pasa a ``7.0``).
+    Usa el lector multihilo de ``pyarrow`` y, si no estuviera disponible, el motor C de Pandas;
+    ambos caminos reciben las mismas columnas y tipos y devuelven el mismo DataFrame.
+
+    Args:
+        up (UploadedFile): Archivo subido con ``st.file_uploader``.
+
+    Returns:
+        pd.DataFrame: Datos leídos. Si algún valor no es numérico se hace una lectura
+        permisiva, para que :func:`insert_from_dataframe` informe el error.
+    """
+    # Columnas del esquema presentes en el archivo (en el orden del archivo)
+    header = next(csv.reader([up.readline().decode('utf-8-sig')]), [])
+    usecols = [c for c in header if c in CSV_DTYPES]
+    up.seek(0)
+    try:
+        # (con include_columns vacío pyarrow leería todas: ese caso va por el motor C)
+        if pa_csv is not None and usecols:
+            opts = pa_csv.ConvertOptions(
+                column_types={c: pa.string() if CSV_DTYPES[c] == 'object' else pa.from_numpy_dtype(np.dtype(CSV_DTYPES[c])) for c in usecols},
+                include_columns=usecols, strings_can_be_null=True,
+            )
+            # El texto llega como cadena de Arrow: se deja en el dtype declarado, igual que el motor C
+            return pa_csv.read_csv(up, convert_options=opts).to_pandas().astype({c: CSV_DTYPES[c] for c in usecols})
+        return pd.read_csv(up, usecols=usecols, dtype=CSV_DTYPES)
+    except ValueError:
+        up.seek(0)
+        return pd.read_csv(up)
+
+def render_sidebar(cats):
     """
     Renderiza la barra lateral de navegación y configuración.
 
@@ -60,11 +237,11 @@ def render_sidebar(df_raw):
     del **Modo Profesor**.
 
     Args:
-        df_raw (pd.DataFrame): El dataset completo de materiales.
+        cats (list): Categorías disponibles en la base (:func:`load_categories`).
 
     Returns:
         tuple: 
-            *   **df_filtered** (pd.DataFrame): Datos filtrados por categoría.
+            *   **sel_cats** (tuple|None): Categorías elegidas, o ``None`` si no se descarta ninguna.
             *   **show_math** (bool): Estado del checkbox del Modo Profesor.
     """
     st.sidebar.header("🔍 Filtros")
@@ -72,11 +249,12 @@ def render_sidebar(df_raw):
     st.sidebar.subheader("👨‍🏫 Modo Profesor")
     show_math = st.sidebar.checkbox("Mostrar Explicación Física", value=True, help="Muestra las ecuaciones y conceptos físicos debajo de la simulación.")
     st.sidebar.divider()
-    if isinstance(df_raw, pd.DataFrame) and 'category' in df_raw.columns:
-        cats = df_raw['category'].unique().tolist()
+    if cats:
         sel_cats = st.sidebar.multiselect("Categoría", cats, default=cats)
-        if sel_cats: return df_raw[df_raw['category'].isin(sel_cats)], show_math
-    return df_raw, show_math
+        # Solo se filtra si la selección descarta algo; el orden no afecta la clave de caché
+        if sel_cats and len(sel_cats) < len(cats):
+            return tuple(sorted(sel_cats)), show_math
+    return None, show_math
 
 def render_tab_management(df_mats):
     """
@@ -94,28 +272,27 @@ def render_tab_management(df_mats):
     c1, c2 = st.columns([2, 1])
     with c1:
         st.subheader("📋 Inventario")
-        st.dataframe(translate_df(df_mats), use_container_width=True, height=400)
+        # Las etiquetas en español van como column_config: sin copiar el DataFrame en cada rerun
+        st.dataframe(df_mats, column_config=LABEL_MAP, use_container_width=True, height=400)
     with c2:
         st.subheader("Gestión")
         with st.expander("📥 Importar CSV"):
             up = st.file_uploader("Archivo", type=['csv'])
             if up and st.button("Cargar"):
                 try:
-                    df_new = pd.read_csv(up)
-                    a, i, e = insert_from_dataframe(df_new)
+                    a, i, e = insert_from_dataframe(read_import_csv(up))
                     if e: st.error(e)
-                    else: st.success(f"Ok: {a}"); st.rerun()
+                    else:
+                        st.success(f"Ok: {a}")
+                        # Todas las cachés keyed en db_mtime: se vacían juntas (las entradas de la
+                        # versión anterior no vuelven a usarse y una escritura dentro de la misma
+                        # resolución de mtime no debe servir datos viejos)
+                        for cached in (load_data, load_index, load_categories, load_db_bytes): cached.clear()
+                        st.rerun()
                 except Exception as ex: st.error(ex)
         try:
-            from pathlib import Path
-            pkg = __package__ if __package__ else 'labterial'
-            db_path = Path.home() / f".{pkg}" / "materials.db"
-            if not db_path.exists(): 
-                db_path = Path(__file__).parent.parent.parent / 'data' / 'materials.db'
-            
-            if db_path.exists():
-                with open(db_path, "rb") as fp:
-                    st.download_button("💾 Backup BD", fp, "materials.db")
+            db_bytes = load_db_bytes(get_db_mtime())
+            st.download_button("💾 Backup BD", db_bytes, "materials.db", mime="application/x-sqlite3")
         except: pass
 
 def render_math_explainer(dat, modo, units, factor, unit_label, geom_params=None):
@@ -123,7 +300,8 @@ def render_math_explainer(dat, modo, units, factor, unit_label, geom_params=None
     
     E = dat['elastic_modulus'] * factor
     Sy = dat['yield_strength'] * factor
-    Su = dat['ultimate_strength'] * factor
+    # Mismo Su que usa la curva (1.1 * Sy si falta el dato)
+    Su = resistencia_ultima(dat) * factor
     
     st.info(f"📘 **Fundamentos Físicos: {modo}**")
     
@@ -160,7 +338,7 @@ def render_math_explainer(dat, modo, units, factor, unit_label, geom_params=None
             """)
 
     elif modo == "Torsion":
-        Nu = dat.get('poisson_ratio', 0.3)
+        Nu = coeficiente_poisson(dat)
         G = E / (2 * (1 + Nu))
         Ty = Sy * 0.577
         
@@ -190,7 +368,7 @@ def render_math_explainer(dat, modo, units, factor, unit_label, geom_params=None
             with c_txt:
                 st.markdown("### 🧱 Efecto Poisson")
                 st.markdown(f"""
-                Al aplastar, el material se ensancha lateralmente según su Coeficiente de Poisson ($\\nu = {dat.get('poisson_ratio', 0.3)}$).
+                Al aplastar, el material se ensancha lateralmente según su Coeficiente de Poisson ($\\nu = {coeficiente_poisson(dat)}$).
                 """)
             with c_eq:
                 st.latex(r"\sigma = - E \cdot \epsilon")
@@ -221,10 +399,15 @@ def render_math_explainer(dat, modo, units, factor, unit_label, geom_params=None
             """)
             st.latex(r"\sigma = K \cdot \epsilon^n")
 
-def render_tab_simulation(df_mats, show_math):
+@st.fragment
+def render_tab_simulation(df_mats, show_math, names, mats_by_name):
     """
     Renderiza la Pestaña 2: Laboratorio Virtual (Núcleo de la App).
 
+    Está declarada como ``st.fragment``: al mover un slider o cambiar un selector de esta
+    pestaña solo se re-ejecuta esta función, no el script completo (ni la carga de datos
+    ni las otras pestañas).
+
     Esta función orquesta toda la lógica de simulación e interacción:
     
     1.  **Configuración:** Selectores de unidades, materiales y modo de ensayo.
@@ -239,6 +422,9 @@ def render_tab_simulation(df_mats, show_math):
     Args:
         df_mats (pd.DataFrame): Materiales disponibles.
         show_math (bool): Flag para mostrar/ocultar el panel educativo.
+        names (array-like): Nombres únicos de ``df_mats`` (precalculados en :func:`load_index`).
+        mats_by_name (dict): Índice ``nombre -> propiedades`` de ``df_mats``. Se arma en :func:`load_index`,
+            así los reruns del fragmento lo reutilizan sin reconstruirlo.
     """
     if df_mats.empty: st.warning("Sin datos."); return
     st.header("🔬 Laboratorio Virtual")
@@ -253,7 +439,7 @@ def render_tab_simulation(df_mats, show_math):
         factor = MPA_TO_KSI if is_imperial else 1.0
         
         st.divider()
-        mats_avail = df_mats['name'].unique()
+        mats_avail = names
         sel = st.multiselect("Probetas", options=mats_avail, default=[mats_avail[0]] if len(mats_avail)>0 else None)
         
         st.divider()
@@ -278,75 +464,71 @@ def render_tab_simulation(df_mats, show_math):
 
     with col_plot:
         if not sel: st.info("Selecciona material."); return
-        fig = go.Figure()
-        export_data = []
+        curves = []
+        db_mtime = get_db_mtime()
 
         for mat in sel:
-            dat = df_mats[df_mats['name'] == mat].iloc[0]
-            props = dict(dat); props['category'] = dat.get('category', 'Metal')
+            # Solo lectura: el dict es compartido por todas las sesiones (st.cache_resource).
+            # ``category`` es NOT NULL en la base, no hace falta un valor por defecto.
+            props = mats_by_name[mat]
             
-            # Llamada al motor físico
-            df_sim = simular_ensayo(props, modo, max_strain_machine=limit)
+            # Llamada al motor físico (cacheada por propiedades, ensayo y límite)
+            curva = simulate_cached(modo, limit, tuple(sorted(props.items())))
             
             # Lógica de visualización dinámica
+            # Arrays float de NumPy (el corte visual es NaN); Plotly los acepta directamente
+            sigma = curva.esfuerzo
             if modo == "Flexion":
-                # Conversión especial para Flexión: Esfuerzo -> Fuerza
-                sigma = df_sim["Esfuerzo (MPa)"]
-                epsilon = df_sim["Deformacion (mm/mm)"]
-                F_val = (2 * sigma * b_val * (d_val**2)) / (3 * L_val)
-                Delta_val = (epsilon * (L_val**2)) / (6 * d_val)
-                
-                x_vals = Delta_val; y_vals = F_val
+                # Conversión especial para Flexión: Esfuerzo -> Fuerza, con la geometría y las
+                # unidades plegadas en un único factor escalar por eje
+                epsilon = curva.deformacion
+                k_F = (2 * b_val * d_val**2) / (3 * L_val)
+                k_D = L_val**2 / (6 * d_val)
                 x_title = "Deflexión (mm)"; y_title = "Fuerza (N)"
                 
                 if is_imperial:
-                    x_vals *= 0.0393701; y_vals *= 0.224809
+                    k_D *= 0.0393701; k_F *= 0.224809
                     x_title = "Deflexión (in)"; y_title = "Fuerza (lbf)"
+                x_vals = epsilon * k_D; y_vals = sigma * k_F
             else:
-                # Conversión estándar de unidades
-                y_vals = df_sim["Esfuerzo (MPa)"] * factor
+                # Conversión estándar de unidades (en SI el array se usa tal cual, sin copia)
+                y_vals = sigma * factor if is_imperial else sigma
                 x_col = "Deformacion (%)" if modo!="Torsion" else "Deformacion (rad)"
-                x_vals = df_sim[x_col]
+                x_vals = curva.deformacion_pct
                 x_title = x_col.replace("Deformacion", "Deformación")
                 y_title = f"Esfuerzo ({unit_label})"
 
-            fig.add_trace(go.Scatter(x=x_vals, y=y_vals, mode='lines', name=mat, line=dict(width=3)))
-            
-            df_tmp = pd.DataFrame({x_title: x_vals, y_title: y_vals, 'Material': mat})
-            export_data.append(df_tmp)
+            curves.append((mat, x_vals, y_vals))
 
         t_map = {"Tension": "Tracción", "Compresion": "Compresión", "Torsion": "Torsión", "Flexion": "Ensayo de Flexión"}
-        fig.update_layout(title=f"Curvas ({units}) - {t_map[modo]}", 
-                          xaxis_title=x_title, yaxis_title=y_title, 
-                          hovermode="x unified", template="plotly_white")
-        
+        export_key = (tuple(sel), modo, limit, units, geom, db_mtime)
         # Zoom inteligente
-        if modo != "Flexion": fig.update_xaxes(range=[0, slider])
+        x_range = [0, slider] if modo != "Flexion" else None
+        fig = build_curves_figure(export_key, curves, f"Curvas ({units}) - {t_map[modo]}", x_title, y_title, x_range)
         
         st.plotly_chart(fig, use_container_width=True)
         
-        if export_data:
-            df_exp = pd.concat(export_data)
-            st.download_button("💾 Descargar Datos (CSV)", df_exp.to_csv(index=False).encode('utf-8'), "simulacion.csv")
+        if curves:
+            st.download_button("💾 Descargar Datos (CSV)", build_export_csv(export_key, curves, x_title, y_title), "simulacion.csv")
 
         if show_math and len(sel) == 1:
-            render_math_explainer(df_mats[df_mats['name'] == sel[0]].iloc[0], modo, units, factor, unit_label, geom)
+            render_math_explainer(mats_by_name[sel[0]], modo, units, factor, unit_label, geom)
             
         # Sección Benchmarking
         st.divider()
         st.subheader("📊 Benchmarking (Comparativa)")
-        df_sub = df_mats[df_mats['name'].isin(sel)].copy()
+        df_sub = pd.DataFrame([mats_by_name[m] for m in sel])
         opts = {"yield_strength": f"Resistencia (Sy)", "elastic_modulus": f"Rigidez (E)", "density": "Densidad", "cost": "Costo"}
         opts = {k:v for k,v in opts.items() if k in df_sub.columns}
         if opts:
             prop = st.selectbox("Comparar:", list(opts.keys()), format_func=lambda x: opts[x])
-            vals = df_sub[prop].values
+            vals = df_sub[prop].to_numpy()
             if is_imperial and prop in ["yield_strength", "elastic_modulus"]: vals = vals * factor
             fig_bar = px.bar(df_sub, x='name', y=vals, color='name', text_auto='.1f', title=opts[prop])
             fig_bar.update_layout(showlegend=False, template="plotly_white", yaxis_title=opts[prop])
             st.plotly_chart(fig_bar, use_container_width=True)
 
-def render_tab_reports(df_mats):
+def render_tab_reports(df_mats, names, mats_by_name):
     """
     Renderiza la Pestaña 3: Reportes.
 
@@ -355,18 +537,23 @@ def render_tab_reports(df_mats):
 
     Args:
         df_mats (pd.DataFrame): DataFrame base.
+        names (array-like): Nombres únicos de ``df_mats``.
+        mats_by_name (dict): Índice ``nombre -> propiedades`` (ver :func:`load_index`).
     """
     st.header("📑 Reportes")
     if df_mats.empty: return
     c1, c2 = st.columns(2)
-    with c1: sel = st.multiselect("Materiales", df_mats['name'].unique())
+    with c1: sel = st.multiselect("Materiales", names)
     with c2: cols = st.multiselect("Propiedades", [c for c in df_mats.columns if c!='id'], default=['name','yield_strength'], format_func=lambda x: LABEL_MAP.get(x, x))
     if sel and cols:
-        df = df_mats[df_mats['name'].isin(sel)][cols]
+        # Filas tomadas del índice por nombre (sin máscara booleana sobre todo el inventario),
+        # en el orden en que se seleccionaron
+        df = pd.DataFrame([mats_by_name[m] for m in sel], columns=cols)
         st.dataframe(df, use_container_width=True)
+        csv_bytes, latex = build_report_exports(df)
         t1, t2 = st.tabs(["CSV", "LaTeX"])
-        with t1: st.download_button("Descargar CSV", df.to_csv(index=False).encode('utf-8'), "data.csv", "text/csv")
-        with t2: st.code(df.to_latex(index=False, float_format="%.2f"), language='latex')
+        with t1: st.download_button("Descargar CSV", csv_bytes, "data.csv", "text/csv")
+        with t2: st.code(latex, language='latex')
 
 def main():
     """
@@ -376,13 +563,19 @@ def main():
     gestiona el sistema de pestañas de la aplicación.
     """
     configure_page()
-    try: df_raw = load_data()
+    # El filtro de categorías se resuelve en SQL: solo se cargan las filas seleccionadas
+    try:
+        db_mtime = get_db_mtime()
+        cats = load_categories(db_mtime)
+    except: return
+    sel_cats, show_math = render_sidebar(cats)
+    try: df_mats = load_data(db_mtime, sel_cats)
     except: return
-    df_mats, show_math = render_sidebar(df_raw)
+    names, mats_by_name = load_index(db_mtime, sel_cats)
     t1, t2, t3 = st.tabs(["📦 Base de Datos", "📈 Simulación", "📑 Reportes"])
     with t1: render_tab_management(df_mats)
-    with t2: render_tab_simulation(df_mats, show_math)
-    with t3: render_tab_reports(df_mats)
+    with t2: render_tab_simulation(df_mats, show_math, names, mats_by_name)
+    with t3: render_tab_reports(df_mats, names, mats_by_name)
 
 if __name__ == "__main__":
     main()
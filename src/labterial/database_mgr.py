@@ -2,6 +2,8 @@ import sqlite3
 import pandas as pd
 import os
 import sys
+import tempfile
+import threading
 from pathlib import Path
 
 # --- CONFIGURACIÓN DE PERSISTENCIA ---
@@ -14,21 +16,119 @@ DB_PATH = USER_DATA_DIR / 'materials.db'
 # Ruta del archivo CSV interno (empaquetado) para restaurar datos por defecto
 INTERNAL_CSV_PATH = os.path.join(os.path.dirname(__file__), 'assets', 'materials_seed.csv')
 
+# Columnas de la tabla ``materials`` que se escriben al insertar (en orden del INSERT)
+MATERIAL_COLUMNS = ['name', 'category', 'elastic_modulus', 'yield_strength', 'ultimate_strength', 'poisson_ratio']
+
+# Consulta base de lectura (columnas explícitas en lugar de SELECT *)
+SELECT_MATERIALS = f"SELECT id, {', '.join(MATERIAL_COLUMNS)} FROM materials"
+
+# Sentencia de inserción única del módulo: al reutilizar siempre el mismo texto, la caché de
+# sentencias preparadas de ``sqlite3`` (por conexión) evita volver a compilarla en cada carga
+INSERT_MATERIAL_SQL = (
+    f"INSERT OR IGNORE INTO materials ({', '.join(MATERIAL_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(MATERIAL_COLUMNS))})"
+)
+
+# Tipos de las columnas leídas: se fijan explícitamente para no depender de la inferencia
+# de Pandas (una columna opcional sin valores llegaría como ``object`` en lugar de float)
+MATERIAL_DTYPES = {
+    'id': 'int64', 'name': 'object', 'category': 'object',
+    'elastic_modulus': 'float64', 'yield_strength': 'float64',
+    'ultimate_strength': 'float64', 'poisson_ratio': 'float64',
+}
+
+# Tipos declarados para leer CSV de materiales (semilla e importaciones) en una sola pasada,
+# sin inferencia de tipos y descartando columnas ajenas al esquema
+CSV_DTYPES = {col: MATERIAL_DTYPES[col] for col in MATERIAL_COLUMNS}
+
+# Tipos del DataFrame que se entrega a la interfaz. Las propiedades se mantienen en float64
+# (llegan tal cual a la tabla, a los reportes y a los CSV exportados; en float32 un 0.26 se
+# exportaría como 0.25999999046325684). ``category`` se guarda como categórica: pocas
+# etiquetas repetidas, codificadas como diccionario también en el Arrow que ``st.dataframe``
+# envía al navegador.
+FRAME_DTYPES = dict(MATERIAL_DTYPES, category='category')
+
+# Ajustes aplicados a cada conexión:
+# - WAL: los lectores no bloquean al escritor (y viceversa) entre sesiones de Streamlit.
+# - synchronous=NORMAL: en modo WAL evita un fsync por cada commit sin arriesgar la integridad.
+# - temp_store / cache_size: tablas temporales y ~20 MB de caché de páginas en memoria.
+# - mmap_size: lecturas mapeadas en memoria (hasta 256 MB) en lugar de read() por página.
+# - busy_timeout: espera hasta 30 s por el bloqueo de escritura en vez de fallar con SQLITE_BUSY.
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=30000",
+)
+
+# Conexión compartida del proceso (ver :func:`get_connection`) y el candado que serializa su uso
+# entre los hilos de Streamlit (reentrante: get_connection también lo toma al abrirla)
+_CONN = None
+_LOCK = threading.RLock()
+# True tras la primera ejecución completa de init_db en este proceso
+_INITIALIZED = False
+
+def _connect(**kwargs):
+    """Abre una conexión a ``DB_PATH`` y le aplica :data:`SQLITE_PRAGMAS`."""
+    conn = sqlite3.connect(str(DB_PATH), **kwargs)
+    for pragma in SQLITE_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+def get_connection():
+    """
+    Devuelve la conexión SQLite compartida por todo el proceso.
+
+    Streamlit re-ejecuta el script completo en cada interacción del usuario; abrir el archivo
+    y repetir las consultas de esquema en cada lectura resultaba costoso. La primera llamada
+    ejecuta :func:`init_db` y abre la conexión; las siguientes la reutilizan.
+
+    Returns:
+        sqlite3.Connection: Conexión abierta con ``check_same_thread=False`` (Streamlit atiende
+        cada sesión en un hilo distinto) e ``isolation_level=None``: el módulo ``sqlite3`` no abre
+        transacciones implícitas, las escrituras declaran las suyas con ``BEGIN``.
+
+    Note:
+        Quien la use desde varios hilos debe hacerlo dentro de ``with _LOCK:``, como las
+        funciones de este módulo.
+    """
+    global _CONN
+    with _LOCK:
+        if _CONN is None:
+            init_db()
+            _CONN = _connect(check_same_thread=False, isolation_level=None)
+        return _CONN
+
+def close_connection():
+    """Cierra la conexión compartida. La siguiente llamada a :func:`get_connection` abrirá una nueva."""
+    global _CONN
+    with _LOCK:
+        if _CONN is not None:
+            _CONN.close()
+            _CONN = None
+
 def init_db():
     """
     Inicializa la infraestructura de la base de datos SQLite.
 
-    Esta función es idempotente (se puede llamar muchas veces sin causar errores).
+    Esta función es idempotente (se puede llamar muchas veces sin causar errores): tras la
+    primera ejecución completa, las llamadas siguientes retornan de inmediato sin tocar el disco.
     Realiza el siguiente flujo de trabajo:
     
     1.  **Verificación de Directorio:** Comprueba si existe la carpeta oculta ``.labterial`` en el directorio *home* del usuario. Si no, la crea.
     2.  **Conexión/Creación:** Conecta con el archivo SQLite. Si no existe, SQLite lo crea automáticamente.
     3.  **Definición de Esquema (DDL):** Ejecuta la sentencia ``CREATE TABLE IF NOT EXISTS`` para asegurar que la tabla ``materials`` tenga la estructura correcta.
-    4.  **Semilla de Datos (Seeding):** Si la base de datos está vacía (conteo = 0), busca el archivo ``materials_seed.csv`` dentro de los recursos del paquete e inserta los materiales por defecto.
+    4.  **Semilla de Datos (Seeding):** Si la base de datos está vacía (no hay ninguna fila), busca el archivo ``materials_seed.csv`` dentro de los recursos del paquete e inserta los materiales por defecto.
 
     Raises:
         sqlite3.Error: Si hay problemas de permisos de escritura en el disco.
     """
+    global _INITIALIZED
+    if _INITIALIZED:
+        return
+
     if not USER_DATA_DIR.exists():
         try:
             USER_DATA_DIR.mkdir(parents=True, exist_ok=True)
@@ -36,7 +136,7 @@ def init_db():
             print(f"Error crítico: No se pudo crear directorio de datos: {e}")
             return
 
-    conn = sqlite3.connect(str(DB_PATH))
+    conn = _connect()
     c = conn.cursor()
     
     # ESQUEMA MAESTRO (Versión simplificada mecánica)
@@ -51,31 +151,27 @@ def init_db():
             poisson_ratio REAL
         )
     ''')
+    # Índice de cobertura para el filtro por categoría de la barra lateral: empieza por
+    # ``category`` e incluye el resto de columnas (``id`` es el rowid), así
+    # get_materials_by_category y get_categories se responden sin leer la tabla.
+    # Reemplaza al antiguo índice de una sola columna.
+    c.execute('DROP INDEX IF EXISTS idx_materials_category')
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_materials_all ON materials(
+            category, name, elastic_modulus, yield_strength, ultimate_strength, poisson_ratio
+        )
+    ''')
     
-    # Carga Inicial Automática
-    c.execute('SELECT count(*) FROM materials')
-    count = c.fetchone()[0]
+    # Carga Inicial Automática (basta saber si existe alguna fila; count(*) recorrería la tabla)
+    c.execute('SELECT 1 FROM materials LIMIT 1')
+    is_empty = c.fetchone() is None
     
-    if count == 0:
+    if is_empty:
         try:
             if os.path.exists(INTERNAL_CSV_PATH):
-                df_seed = pd.read_csv(INTERNAL_CSV_PATH)
+                df_seed = pd.read_csv(INTERNAL_CSV_PATH, usecols=lambda c: c in CSV_DTYPES, dtype=CSV_DTYPES)
                 # Insertar solo columnas mecánicas soportadas por el esquema actual
-                # Usamos inserción fila por fila para mayor seguridad contra errores individuales
-                inserted_count = 0
-                for _, row in df_seed.iterrows():
-                    try:
-                        c.execute('''
-                            INSERT INTO materials 
-                            (name, category, elastic_modulus, yield_strength, ultimate_strength, poisson_ratio) 
-                            VALUES (?,?,?,?,?,?)
-                        ''', (
-                            row['name'], row['category'], row['elastic_modulus'], row['yield_strength'], 
-                            row.get('ultimate_strength'), row.get('poisson_ratio')
-                        ))
-                        inserted_count += 1
-                    except sqlite3.IntegrityError: 
-                        pass # Ignorar duplicados silenciosamente en la carga inicial
+                inserted_count = _insert_rows(conn, _rows_from_dataframe(df_seed))
                 print(f"✅ Base de datos inicializada con {inserted_count} materiales por defecto.")
             else:
                 print(f"⚠️ Advertencia: No se encontró el archivo semilla en {INTERNAL_CSV_PATH}")
@@ -84,27 +180,167 @@ def init_db():
         
     conn.commit()
     conn.close()
+    _INITIALIZED = True
+
+# Columnas obligatorias de toda importación (NOT NULL en el esquema)
+REQUIRED_COLUMNS = ['name', 'category', 'elastic_modulus', 'yield_strength']
+
+# Columnas numéricas del esquema (se validan como float antes de insertar)
+NUMERIC_COLUMNS = ['elastic_modulus', 'yield_strength', 'ultimate_strength', 'poisson_ratio']
+
+def _missing_column_error(columns):
+    """Devuelve el mensaje de error por la primera columna obligatoria ausente, o ``None``."""
+    # Una diferencia de conjuntos; se informa la primera en orden
+    missing = set(REQUIRED_COLUMNS).difference(columns)
+    if missing:
+        r = next(c for c in REQUIRED_COLUMNS if c in missing)
+        return f"Falta columna requerida en el archivo: '{r}'"
+    return None
+
+def _rows_from_dataframe(df):
+    """
+    Convierte un DataFrame en la lista de tuplas que espera :func:`_insert_rows`.
+
+    Una sola conversión vectorizada: reindexa a :data:`MATERIAL_COLUMNS` (las columnas opcionales
+    ausentes quedan en NULL), castea las numéricas a float y traduce los NaN a ``None``.
+
+    Raises:
+        ValueError: Si alguna columna numérica contiene valores no convertibles.
+    """
+    data = df.reindex(columns=MATERIAL_COLUMNS).astype(dict.fromkeys(NUMERIC_COLUMNS, 'float64'))
+    data = data.astype(object).where(data.notna(), None)
+    return list(data.itertuples(index=False, name=None))
+
+def _insert_rows(conn, rows):
+    """
+    Inserta filas en ``materials`` con un único ``executemany`` dentro de una transacción.
+
+    ``INSERT OR IGNORE`` deja que SQLite descarte los nombres repetidos (UNIQUE) y las filas
+    incompletas (NOT NULL) sin lanzar una excepción por fila.
+
+    Args:
+        conn (sqlite3.Connection): Conexión sin transacción abierta.
+        rows (list): Tuplas en el orden de :data:`MATERIAL_COLUMNS`.
+
+    Returns:
+        int: Cantidad de filas insertadas.
+    """
+    cursor = conn.cursor()
+    # BEGIN IMMEDIATE toma el bloqueo de escritura desde el inicio; un único commit al final
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        cursor.executemany(INSERT_MATERIAL_SQL, rows)
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
+    return cursor.rowcount
+
+def _read_materials(query, params=None):
+    """
+    Ejecuta una consulta sobre ``materials`` y devuelve un DataFrame con :data:`FRAME_DTYPES`.
+
+    Construye el DataFrame directamente desde las tuplas del cursor (``from_records``), sin el
+    paso intermedio por columnas de ``pd.read_sql_query`` ni su inferencia de tipos.
+    """
+    try:
+        with _LOCK:
+            cur = get_connection().execute(query, params or ())
+            records = cur.fetchall()
+    except sqlite3.DatabaseError:
+        # Si la tabla está corrupta o no existe, devolvemos DF vacío
+        return pd.DataFrame()
+    df = pd.DataFrame.from_records(records, columns=[d[0] for d in cur.description])
+    return df.astype(FRAME_DTYPES)
+
+def get_db_mtime():
+    """
+    Devuelve la fecha de última modificación del archivo de base de datos.
+
+    Pensada como clave de caché para la interfaz: cambia cada vez que se escribe en la base.
+    En modo WAL las escrituras recientes viven en ``materials.db-wal`` hasta el siguiente
+    *checkpoint*, así que se considera también ese archivo.
+
+    Returns:
+        float: Marca de tiempo ``st_mtime`` más reciente, o ``0.0`` si el archivo aún no existe.
+    """
+    mtime = 0.0
+    for path in (str(DB_PATH), str(DB_PATH) + "-wal"):
+        try:
+            mtime = max(mtime, os.path.getmtime(path))
+        except OSError:
+            pass
+    return mtime
+
+def export_db_bytes():
+    """
+    Genera una copia consistente de la base de datos, lista para descargar como backup.
+
+    Usa la API de backup en línea de SQLite (``Connection.backup``) en lugar de leer el archivo
+    directamente: la copia incluye las escrituras que aún viven en el WAL y no se lee
+    ``materials.db`` a medias mientras otra sesión escribe.
+
+    Returns:
+        bytes: Contenido de un archivo ``.db`` equivalente a ``materials.db``.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'materials.db')
+        dst = sqlite3.connect(path)
+        try:
+            with _LOCK:
+                get_connection().backup(dst)
+        finally:
+            dst.close()
+        with open(path, 'rb') as fp:
+            return fp.read()
 
 def get_all_materials():
     """
     Recupera el inventario completo de la base de datos.
 
-    Llama internamente a :func:`init_db` para asegurar que la base de datos exista antes de leer.
+    Usa la conexión compartida de :func:`get_connection`, que garantiza que la base de datos
+    exista antes de leer.
 
     Returns:
-        pd.DataFrame: Un DataFrame de Pandas que contiene todas las columnas de la tabla ``materials``.
+        pd.DataFrame: Un DataFrame de Pandas con ``id`` y las columnas de :data:`MATERIAL_COLUMNS`.
         Ideal para ser renderizado directamente por ``st.dataframe``.
     """
-    init_db()
-    conn = sqlite3.connect(str(DB_PATH))
+    return _read_materials(SELECT_MATERIALS)
+
+def get_categories():
+    """
+    Lista las categorías presentes en la base, en orden alfabético.
+
+    Se resuelve con un ``SELECT DISTINCT`` sobre el índice ``idx_materials_all``, sin
+    cargar la tabla completa.
+
+    Returns:
+        list: Nombres de categoría (vacía si la tabla no existe o está corrupta).
+    """
     try:
-        df = pd.read_sql_query("SELECT * FROM materials", conn)
-    except pd.io.sql.DatabaseError:
-        # Si la tabla está corrupta o no existe, devolvemos DF vacío
-        df = pd.DataFrame()
-    finally:
-        conn.close()
-    return df
+        with _LOCK:
+            rows = get_connection().execute(
+                "SELECT DISTINCT category FROM materials ORDER BY category"
+            ).fetchall()
+    except sqlite3.DatabaseError:
+        return []
+    return [r[0] for r in rows]
+
+def get_materials_by_category(categories):
+    """
+    Recupera solo los materiales de las categorías indicadas.
+
+    El filtro se resuelve en SQLite (con el índice de cobertura ``idx_materials_all``), de modo
+    que las filas descartadas nunca llegan a Pandas.
+
+    Args:
+        categories (list): Categorías a incluir (ej. ``['Metal', 'Polimero']``).
+
+    Returns:
+        pd.DataFrame: Mismas columnas que :func:`get_all_materials`.
+    """
+    marks = ','.join('?' * len(categories))
+    return _read_materials(f"{SELECT_MATERIALS} WHERE category IN ({marks})", list(categories))
 
 def insert_from_dataframe(df):
     """
@@ -124,37 +360,69 @@ def insert_from_dataframe(df):
         *   **ignored (int):** Cantidad de materiales ignorados porque el nombre ya existía (Constraint UNIQUE).
         *   **error_msg (str|None):** Mensaje de error si faltan columnas o hay problemas de datos. ``None`` si el proceso corrió bien.
     """
-    init_db()
-    conn = sqlite3.connect(str(DB_PATH))
-    cursor = conn.cursor()
-    added = 0
-    ignored = 0
-    
     # Validación de columnas mínimas
-    req = ['name', 'category', 'elastic_modulus', 'yield_strength']
-    for r in req:
-        if r not in df.columns: 
-            conn.close()
-            return 0, 0, f"Falta columna requerida en el archivo: '{r}'"
-        
-    for _, row in df.iterrows():
+    error = _missing_column_error(df.columns)
+    if error:
+        return 0, 0, error
+
+    try:
+        rows = _rows_from_dataframe(df)
+    except (ValueError, TypeError) as e:
+        return 0, 0, f"Datos numéricos inválidos: {e}"
+
+    return _import_rows(rows)
+
+def insert_from_records(rows, columns):
+    """
+    Importación masiva desde tuplas planas, sin pasar por un DataFrame.
+
+    Forma parte de la API pública del módulo, junto a :func:`insert_from_dataframe` (que es la
+    que usa la interfaz para los CSV subidos): pensada para quien ya tiene los datos como filas
+    (scripts, lectores propios). Mismas validaciones y mismo resultado; las tuplas se reordenan
+    a :data:`MATERIAL_COLUMNS` y van directo al ``executemany``.
+
+    Args:
+        rows (iterable): Tuplas de valores, en el orden de ``columns``. ``None`` equivale a NULL.
+        columns (list): Nombres de columna de cada tupla (ej. ``['name', 'category', ...]``).
+            Las columnas ajenas al esquema se descartan.
+
+    Returns:
+        tuple: ``(added, ignored, error_msg)``, igual que :func:`insert_from_dataframe`. Una fila
+        con distinta cantidad de valores que ``columns`` se informa en ``error_msg`` y no se
+        inserta nada.
+    """
+    error = _missing_column_error(columns)
+    if error:
+        return 0, 0, error
+
+    pos = {c: i for i, c in enumerate(columns)}
+    idx = [pos.get(c) for c in MATERIAL_COLUMNS]
+    numeric = [i for c, i in zip(MATERIAL_COLUMNS, idx) if c in NUMERIC_COLUMNS and i is not None]
+    try:
+        data = []
+        for n, row in enumerate(rows, start=1):
+            row = list(row)
+            if len(row) != len(columns):
+                return 0, 0, f"Fila {n}: {len(row)} valores, se esperaban {len(columns)}"
+            for i in numeric:
+                if row[i] is not None:
+                    row[i] = float(row[i])
+            data.append(tuple(None if i is None else row[i] for i in idx))
+    except (ValueError, TypeError) as e:
+        return 0, 0, f"Datos numéricos inválidos: {e}"
+
+    return _import_rows(data)
+
+def _import_rows(rows):
+    """Inserta filas ya validadas con la conexión compartida y devuelve ``(added, ignored, None)``."""
+    with _LOCK:
+        conn = get_connection()
         try:
-            cursor.execute('''
-                INSERT INTO materials 
-                (name, category, elastic_modulus, yield_strength, ultimate_strength, poisson_ratio) 
-                VALUES (?,?,?,?,?,?)
-            ''', (
-                row['name'], row['category'], row['elastic_modulus'], row['yield_strength'], 
-                row.get('ultimate_strength'), row.get('poisson_ratio')
-            ))
-            added += 1
-        except sqlite3.IntegrityError: 
-            # El material ya existe (nombre duplicado)
-            ignored += 1
+            added = _insert_rows(conn, rows)
         except Exception as e:
-            conn.close()
-            return added, ignored, str(e)
-            
-    conn.commit()
-    conn.close()
+            return 0, 0, str(e)
+        # Volcar el WAL al archivo principal tras la carga masiva (mantiene acotado materials.db-wal)
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    ignored = len(rows) - added
     return added, ignored, None
@@ -1,6 +1,17 @@
+from collections import namedtuple
+
 import numpy as np
 import pandas as pd
 
+# Resultado de :func:`simular_curva`: arrays de NumPy sin pasar por un DataFrame.
+# ``col_deformacion`` es el nombre de la columna de deformación en :func:`simular_ensayo`.
+Curva = namedtuple('Curva', 'deformacion esfuerzo deformacion_pct col_deformacion')
+
+# Familias de materiales según su comportamiento (pertenencia O(1) en simular_curva)
+FRAGILES = frozenset({'Ceramico', 'Vidrio'})
+DUCTILES = frozenset({'Metal', 'Polimero'})
+ELASTICO_LINEAL = FRAGILES | {'Compuesto'}
+
 # ==============================================================================
 # FUNCIONES GENERADORAS (Modelos Matemáticos Vectoriales)
 # ==============================================================================
@@ -22,15 +33,15 @@ def curva_tension_metal(E, Sy, Su, epsilon_ruptura, p=500):
         p (int, optional): Número de puntos a generar. Default 500.
 
     Returns:
-        tuple: Dos arrays de numpy ``(deformacion, esfuerzo)``. El último punto de esfuerzo es ``None`` para simular el corte visual.
+        tuple: Dos arrays de numpy ``(deformacion, esfuerzo)``. El último punto de esfuerzo es ``NaN`` para simular el corte visual.
     """
     εy = Sy / E
     
     # Caso Frágil (Sin zona plástica significativa)
     if epsilon_ruptura <= εy: 
-        e = np.linspace(0, epsilon_ruptura, p)
-        s = E * e
-        e = np.append(e, epsilon_ruptura * 1.001); s = np.append(s, None)
+        e = np.empty(p + 1); e[:p] = np.linspace(0, epsilon_ruptura, p)
+        e[p] = epsilon_ruptura * 1.001
+        s = E * e; s[p] = np.nan
         return e, s
 
     # Caso Dúctil
@@ -41,29 +52,35 @@ def curva_tension_metal(E, Sy, Su, epsilon_ruptura, p=500):
     p2 = max(2, int(p * ((εu - εy) / epsilon_ruptura)))
     p3 = max(2, p - p1 - p2)
 
+    # Un único buffer por eje (+1 para el corte visual): cada fase escribe en su tramo,
+    # sin arrays intermedios ni concatenate/append. Las fases no lineales se calculan en
+    # el propio tramo de esfuerzo (``out=``), que hace de buffer para la razón normalizada.
+    deformacion = np.empty(p1 + p2 + p3 + 1); esfuerzo = np.empty_like(deformacion)
+    e1, e2, e3 = deformacion[:p1], deformacion[p1:p1 + p2], deformacion[p1 + p2:-1]
+    s1, s2, s3 = esfuerzo[:p1], esfuerzo[p1:p1 + p2], esfuerzo[p1 + p2:-1]
+
     # Fase 1: Elástica
-    e1 = np.linspace(0, εy, p1); s1 = E * e1
+    e1[:] = np.linspace(0, εy, p1); np.multiply(E, e1, out=s1)
     
     # Fase 2: Endurecimiento (Hasta Su)
-    e2 = np.linspace(εy, εu, p2)
+    e2[:] = np.linspace(εy, εu, p2)
     if (εu > εy):
         # Interpolación de potencia (Hollomon simplificado)
-        s2 = Sy + (Su - Sy) * (((e2 - εy) / (εu - εy)) ** 0.5)
-    else: s2 = np.full_like(e2, Su)
+        np.subtract(e2, εy, out=s2); s2 /= (εu - εy); np.sqrt(s2, out=s2)
+        s2 *= (Su - Sy); s2 += Sy
+    else: s2[:] = Su
 
     # Fase 3: Estricción (Post Su)
-    e3 = np.linspace(εu, epsilon_ruptura, p3)
+    e3[:] = np.linspace(εu, epsilon_ruptura, p3)
     Sf = Su * 0.85 # Asumimos caída al 85% de carga antes de romper
     if (epsilon_ruptura > εu):
-        s3 = Su - (Su - Sf) * (((e3 - εu) / (epsilon_ruptura - εu)) ** 2)
-    else: s3 = np.full_like(e3, Sf)
+        np.subtract(e3, εu, out=s3); s3 /= (epsilon_ruptura - εu); np.square(s3, out=s3)
+        s3 *= -(Su - Sf); s3 += Su
+    else: s3[:] = Sf
 
-    deformacion = np.concatenate((e1, e2, e3))
-    esfuerzo = np.concatenate((s1, s2, s3))
-    
     # Corte visual
-    deformacion = np.append(deformacion, epsilon_ruptura * 1.001)
-    esfuerzo = np.append(esfuerzo, None)
+    deformacion[-1] = epsilon_ruptura * 1.001
+    esfuerzo[-1] = np.nan
     return deformacion, esfuerzo
 
 def curva_tension_polimero(E, Sy, Su, epsilon_ruptura, p=500):
@@ -90,38 +107,45 @@ def curva_tension_polimero(E, Sy, Su, epsilon_ruptura, p=500):
     
     # Caso Frágil (Termoestables o Amorfos rígidos)
     if epsilon_ruptura <= εy * 1.5: 
-        e = np.linspace(0, epsilon_ruptura, p)
+        e = np.empty(p + 1); s = np.empty_like(e)
+        e[:p] = np.linspace(0, epsilon_ruptura, p)
         # Modelo ligeramente no lineal
-        s = E * e - (E * 0.2 * e**2 / epsilon_ruptura)
-        s = np.minimum(s, Su)
-        e = np.append(e, epsilon_ruptura * 1.001); s = np.append(s, None)
+        np.minimum(E * e[:p] - (E * 0.2 * e[:p]**2 / epsilon_ruptura), Su, out=s[:p])
+        e[p] = epsilon_ruptura * 1.001
+        s[p] = np.nan
         return e, s
 
     # Caso Dúctil (Semicristalinos)
     Su_draw = Sy * 0.8; ε_cold_draw_end = epsilon_ruptura * 0.75
     p1 = int(p*0.1); p2 = int(p*0.1); p3 = int(p*0.5); p4 = max(2, p-p1-p2-p3)
 
+    # Buffers preasignados (+1 para el corte visual), un tramo por fase; cada tramo de
+    # esfuerzo sirve de buffer para su razón normalizada
+    c1, c2, c3 = p1, p1 + p2, p1 + p2 + p3
+    deformacion = np.empty(c3 + p4 + 1); esfuerzo = np.empty_like(deformacion)
+    e1, e2, e3, e4 = deformacion[:c1], deformacion[c1:c2], deformacion[c2:c3], deformacion[c3:-1]
+    s1, s2, s3, s4 = esfuerzo[:c1], esfuerzo[c1:c2], esfuerzo[c2:c3], esfuerzo[c3:-1]
+
     # 1. Elástica
-    e1 = np.linspace(0, εy, p1); s1 = E * e1
+    e1[:] = np.linspace(0, εy, p1); np.multiply(E, e1, out=s1)
     
     # 2. Caída (Yield Drop)
-    e2 = np.linspace(εy, εy*2.5, p2)
-    if len(e2)>0: s2 = Sy - (Sy - Su_draw) * (((e2-e2[0])/(e2[-1]-e2[0]))**0.5)
-    else: s2 = []
+    e2[:] = np.linspace(εy, εy*2.5, p2)
+    if len(e2)>0:
+        np.subtract(e2, e2[0], out=s2); s2 /= (e2[-1]-e2[0]); np.sqrt(s2, out=s2)
+        s2 *= -(Sy - Su_draw); s2 += Sy
     
     # 3. Meseta
-    e3 = np.linspace(e2[-1], ε_cold_draw_end, p3); s3 = np.full_like(e3, Su_draw)
+    e3[:] = np.linspace(e2[-1], ε_cold_draw_end, p3); s3[:] = Su_draw
     
     # 4. Endurecimiento
-    e4 = np.linspace(ε_cold_draw_end, epsilon_ruptura, p4)
-    if len(e4)>0: s4 = Su_draw + (Su - Su_draw) * (((e4-e4[0])/(e4[-1]-e4[0]))**1.5)
-    else: s4 = []
+    e4[:] = np.linspace(ε_cold_draw_end, epsilon_ruptura, p4)
+    if len(e4)>0:
+        np.subtract(e4, e4[0], out=s4); s4 /= (e4[-1]-e4[0]); np.power(s4, 1.5, out=s4)
+        s4 *= (Su - Su_draw); s4 += Su_draw
 
-    deformacion = np.concatenate((e1, e2, e3, e4))
-    esfuerzo = np.concatenate((s1, s2, s3, s4))
-    
-    deformacion = np.append(deformacion, epsilon_ruptura * 1.001)
-    esfuerzo = np.append(esfuerzo, None)
+    deformacion[-1] = epsilon_ruptura * 1.001
+    esfuerzo[-1] = np.nan
     return deformacion, esfuerzo
 
 def curva_compresion(E, Sy, Su, max_strain, p=500):
@@ -141,16 +165,20 @@ def curva_compresion(E, Sy, Su, max_strain, p=500):
     εy = Sy / E
     p1 = max(2, int(p * 0.1)); p2 = max(2, p - p1)
     
-    e1 = np.linspace(0, εy, p1); s1 = E * e1
-    e2 = np.linspace(εy, max_strain, p2)
+    deformacion = np.empty(p1 + p2); esfuerzo = np.empty_like(deformacion)
+    e1, e2 = deformacion[:p1], deformacion[p1:]
+    s1, s2 = esfuerzo[:p1], esfuerzo[p1:]
+
+    e1[:] = np.linspace(0, εy, p1); np.multiply(E, e1, out=s1)
+    e2[:] = np.linspace(εy, max_strain, p2)
     
     if len(e2) > 0:
         # Modelo constitutivo de endurecimiento continuo
         K = (Su - Sy) / (0.2 ** 0.5) # Calibración empírica
-        s2 = Sy + K * ((e2 - εy) ** 0.5)
-    else: s2 = []
+        np.subtract(e2, εy, out=s2); np.sqrt(s2, out=s2)
+        s2 *= K; s2 += Sy
     
-    return np.concatenate((e1, e2)), -np.concatenate((s1, s2))
+    return deformacion, np.negative(esfuerzo, out=esfuerzo)
 
 def curva_torsion(G, Ty, Tu, gamma_ruptura, is_brittle, p=500):
     """
@@ -170,38 +198,74 @@ def curva_torsion(G, Ty, Tu, gamma_ruptura, is_brittle, p=500):
     
     # CASO 1: FRÁGIL (Lineal hasta rotura)
     if is_brittle or gamma_ruptura <= gy:
-        g = np.linspace(0, gamma_ruptura, p)
-        t = G * g
-        g = np.append(g, gamma_ruptura * 1.001)
-        t = np.append(t, None)
+        g = np.empty(p + 1); g[:p] = np.linspace(0, gamma_ruptura, p)
+        g[p] = gamma_ruptura * 1.001
+        t = G * g; t[p] = np.nan
         return g, t
 
     # CASO 2: DÚCTIL (Gran deformación plástica sin estricción)
     p1 = max(2, int(p * 0.10)) 
     p2 = max(2, p - p1)
     
-    g1 = np.linspace(0, gy, p1)
-    t1 = G * g1
+    g_total = np.empty(p1 + p2 + 1); t_total = np.empty_like(g_total)
+    g1, g2 = g_total[:p1], g_total[p1:-1]
+    t1, t2 = t_total[:p1], t_total[p1:-1]
+
+    g1[:] = np.linspace(0, gy, p1)
+    np.multiply(G, g1, out=t1)
     
-    g2 = np.linspace(gy, gamma_ruptura, p2)
+    g2[:] = np.linspace(gy, gamma_ruptura, p2)
     if len(g2) > 0:
         # Endurecimiento suave (casi plano) típico de torsión
-        ratio = (g2 - gy) / (gamma_ruptura - gy)
-        t2 = Ty + (Tu - Ty) * (ratio ** 0.2)
-    else: t2 = []
-        
-    g_total = np.concatenate((g1, g2))
-    t_total = np.concatenate((t1, t2))
+        # (la razón normalizada se calcula directamente en el tramo de salida)
+        np.subtract(g2, gy, out=t2); t2 /= (gamma_ruptura - gy); np.power(t2, 0.2, out=t2)
+        t2 *= (Tu - Ty); t2 += Ty
     
-    g_total = np.append(g_total, gamma_ruptura * 1.001)
-    t_total = np.append(t_total, None)
+    g_total[-1] = gamma_ruptura * 1.001
+    t_total[-1] = np.nan
     return g_total, t_total
 
 # ==============================================================================
 # ORQUESTADOR PRINCIPAL
 # ==============================================================================
 
-def simular_ensayo(material_props, tipo_ensayo, max_strain_machine=0.05, puntos=500):
+def resistencia_ultima(material_props):
+    """
+    Esfuerzo último (Su) del material, con ``1.1 * Sy`` por defecto.
+
+    Se usa el valor por defecto si ``ultimate_strength`` falta, es ``None``, es ``NaN`` (un NULL
+    de la base leído con Pandas) o no supera al límite elástico.
+
+    Args:
+        material_props (dict): Propiedades del material (``yield_strength`` obligatorio).
+
+    Returns:
+        float: Esfuerzo último (MPa).
+    """
+    Sy = float(material_props['yield_strength'])
+    Su = material_props.get('ultimate_strength')
+    # Una sola comparación cubre también el NaN (toda comparación con NaN es falsa)
+    if Su is None or not Su > Sy: Su = Sy * 1.1
+    return Su
+
+def coeficiente_poisson(material_props):
+    """
+    Coeficiente de Poisson del material, con 0.3 por defecto.
+
+    Un ``poisson_ratio`` sin dato llega como ``None`` (o sin la clave) desde un dict, y como
+    ``NaN`` cuando es un NULL de la base leído con Pandas; en ambos casos se usa 0.3.
+
+    Args:
+        material_props (dict): Propiedades del material.
+
+    Returns:
+        float: Coeficiente de Poisson (adimensional).
+    """
+    Nu = material_props.get('poisson_ratio')
+    if Nu is None or Nu != Nu: Nu = 0.3
+    return Nu
+
+def simular_curva(material_props, tipo_ensayo, max_strain_machine=0.05, puntos=500):
     """
     Función principal que orquesta la simulación física.
 
@@ -213,6 +277,9 @@ def simular_ensayo(material_props, tipo_ensayo, max_strain_machine=0.05, puntos=
     4.  **Recorte:** Filtra los datos generados para que coincidan con el límite visual de la máquina
         (slider), pero conservando el punto de ruptura si ocurre antes.
 
+    Devuelve arrays de NumPy (sin construir un DataFrame), listos para Plotly; la interfaz
+    la usa directamente. :func:`simular_ensayo` ofrece el mismo resultado como DataFrame.
+
     Args:
         material_props (dict): Propiedades del material (elastic_modulus, yield_strength, etc).
         tipo_ensayo (str): 'Tension', 'Compresion', 'Torsion', 'Flexion'.
@@ -220,16 +287,16 @@ def simular_ensayo(material_props, tipo_ensayo, max_strain_machine=0.05, puntos=
         puntos (int): Resolución.
 
     Returns:
-        pd.DataFrame: DataFrame con columnas ``Deformacion``, ``Esfuerzo (MPa)`` y ``Deformacion (%)``.
+        Curva: ``(deformacion, esfuerzo, deformacion_pct, col_deformacion)``. El esfuerzo está en
+        MPa y termina en ``NaN`` si la ruptura ocurre dentro del límite; en Torsión la
+        deformación es angular (rad) y ``deformacion_pct`` es el mismo array.
     """
     
     E = float(material_props['elastic_modulus'])
     Sy = float(material_props['yield_strength'])
-    Su = material_props.get('ultimate_strength')
-    Nu = material_props.get('poisson_ratio', 0.3)
+    Su = resistencia_ultima(material_props)
+    Nu = coeficiente_poisson(material_props)
     Cat = material_props.get('category', 'Metal')
-    
-    if Su is None or Su <= Sy: Su = Sy * 1.1
 
     # --- DUCTILIDAD BASE (Axial) ---
     rupture_strain = 0.01
@@ -241,14 +308,14 @@ def simular_ensayo(material_props, tipo_ensayo, max_strain_machine=0.05, puntos=
         if E < 500: rupture_strain = 3.0
         elif E < 2500: rupture_strain = 1200.0 / E 
         else: rupture_strain = 0.05 + (500.0 / E)
-    elif Cat in ['Ceramico', 'Vidrio']:
+    elif Cat in FRAGILES:
         rupture_strain = (Sy / E) + 0.0005
     elif Cat == 'Compuesto':
         rupture_strain = (Su / E) * 1.2
 
     # --- AJUSTE PARA TORSIÓN (Ductilidad Angular Amplificada) ---
     if tipo_ensayo == 'Torsion':
-        if Cat in ['Metal', 'Polimero'] and rupture_strain > 0.05:
+        if Cat in DUCTILES and rupture_strain > 0.05:
             rupture_strain *= 6.0 
         else:
             rupture_strain *= 1.3
@@ -261,17 +328,16 @@ def simular_ensayo(material_props, tipo_ensayo, max_strain_machine=0.05, puntos=
         G = E / (2 * (1 + Nu))
         Ty = Sy * 0.577 # Von Mises
         Tu = Su * 0.7 
-        is_brittle = (Cat in ['Ceramico', 'Vidrio']) or (rupture_strain < 0.05)
+        is_brittle = (Cat in FRAGILES) or (rupture_strain < 0.05)
         strain_vec, stress_vec = curva_torsion(G, Ty, Tu, rupture_strain, is_brittle, puntos)
         
     elif tipo_ensayo == 'Tension':
         if Cat == 'Polimero':
             strain_vec, stress_vec = curva_tension_polimero(E, Sy, Su, rupture_strain, puntos)
-        elif Cat in ['Ceramico', 'Vidrio', 'Compuesto']:
-            strain_vec = np.linspace(0, rupture_strain, puntos)
-            stress_vec = E * strain_vec
-            strain_vec = np.append(strain_vec, rupture_strain*1.001)
-            stress_vec = np.append(stress_vec, None)
+        elif Cat in ELASTICO_LINEAL:
+            strain_vec = np.empty(puntos + 1); strain_vec[:puntos] = np.linspace(0, rupture_strain, puntos)
+            strain_vec[-1] = rupture_strain*1.001
+            stress_vec = E * strain_vec; stress_vec[-1] = np.nan
         else:
             strain_vec, stress_vec = curva_tension_metal(E, Sy, Su, rupture_strain, puntos)
             
@@ -286,23 +352,42 @@ def simular_ensayo(material_props, tipo_ensayo, max_strain_machine=0.05, puntos=
         strain_vec, stress_vec = curva_tension_metal(E, Sy, Su*factor_mor, rupture_strain, puntos)
 
     # --- RECORTE DE DATOS (CLIPPING) ---
-    df = pd.DataFrame({"e": strain_vec, "s": stress_vec})
-    mask = (df["e"] <= max_strain_machine) | (df["s"].isna())
-    df = df[mask].copy()
-    
-    # Limpieza de bordes si el corte visual quedó muy lejos
-    if not df.empty and not pd.isna(df.iloc[-1]["s"]):
-         if df.iloc[-1]["e"] > max_strain_machine * 1.01:
-             df = df[df["e"] <= max_strain_machine]
+    # Sobre los arrays de NumPy: se conservan los puntos dentro del límite de la máquina
+    # y el corte visual (NaN) si la ruptura ocurre antes
+    mask = (strain_vec <= max_strain_machine) | np.isnan(stress_vec)
+    strain_vec = strain_vec[mask]; stress_vec = stress_vec[mask]
 
-    # Formateo final
     col_strain = "Deformacion (rad)" if tipo_ensayo == 'Torsion' else "Deformacion (mm/mm)"
-    final = pd.DataFrame({
-        col_strain: df["e"],
-        "Esfuerzo (MPa)": df["s"]
+    strain_pct = strain_vec * 100 if tipo_ensayo != 'Torsion' else strain_vec
+    return Curva(strain_vec, stress_vec, strain_pct, col_strain)
+
+def curva_a_dataframe(curva):
+    """
+    Convierte una :data:`Curva` al DataFrame de :func:`simular_ensayo`.
+
+    Args:
+        curva (Curva): Resultado de :func:`simular_curva`.
+
+    Returns:
+        pd.DataFrame: Columnas ``Deformacion``, ``Esfuerzo (MPa)`` y ``Deformacion (%)``.
+    """
+    return pd.DataFrame({
+        curva.col_deformacion: curva.deformacion,
+        "Esfuerzo (MPa)": curva.esfuerzo,
+        "Deformacion (%)": curva.deformacion_pct
     })
-    
-    if tipo_ensayo != 'Torsion': final["Deformacion (%)"] = final[col_strain] * 100
-    else: final["Deformacion (%)"] = final[col_strain]
 
-    return final
+def simular_ensayo(material_props, tipo_ensayo, max_strain_machine=0.05, puntos=500):
+    """
+    Simula un ensayo (:func:`simular_curva`) y devuelve el resultado como DataFrame.
+
+    Args:
+        material_props (dict): Propiedades del material (elastic_modulus, yield_strength, etc).
+        tipo_ensayo (str): 'Tension', 'Compresion', 'Torsion', 'Flexion'.
+        max_strain_machine (float): Límite del eje X definido por el usuario.
+        puntos (int): Resolución.
+
+    Returns:
+        pd.DataFrame: DataFrame con columnas ``Deformacion``, ``Esfuerzo (MPa)`` y ``Deformacion (%)``.
+    """
+    return curva_a_dataframe(simular_curva(material_props, tipo_ensayo, max_strain_machine, puntos))
@@ -8,10 +8,10 @@ from unittest.mock import patch
 # Configuración de Path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
 
-try:
-    from labterial import database_mgr
-except ImportError:
-    from src.labterial import database_mgr
+from labterial import database_mgr
+
+# Lote de un material ya existente (solo lectura: insert_from_dataframe no modifica el DataFrame)
+_DUP_DF = pd.DataFrame({'name': ['Adamantium'], 'category': ['Metal'], 'elastic_modulus': [1], 'yield_strength': [1]})
 
 # --- CLASE HELPER PARA PYTHON 3.12 ---
 class UnclosableConnection:
@@ -21,9 +21,15 @@ class UnclosableConnection:
     """
     def __init__(self, conn):
         self.conn = conn
+        # Métodos usados por database_mgr, enlazados una vez: evitan pasar por __getattr__ en cada llamada
+        self.cursor = conn.cursor
+        self.execute = conn.execute
+        self.executemany = conn.executemany
+        self.commit = conn.commit
+        self.rollback = conn.rollback
     
     def __getattr__(self, name):
-        # Delega cualquier llamada (cursor, commit, etc) a la conexión real
+        # Resto de atributos (backup, etc.): se delegan a la conexión real
         return getattr(self.conn, name)
     
     def close(self):
@@ -32,13 +38,16 @@ class UnclosableConnection:
 
 class TestDatabase(unittest.TestCase):
     
-    def setUp(self):
-        # 1. Crear conexión real en memoria
-        self.real_conn = sqlite3.connect(':memory:')
-        self.cursor = self.real_conn.cursor()
+    @classmethod
+    def setUpClass(cls):
+        # 1. Crear conexión real en memoria (una sola para toda la clase)
+        cls.real_conn = sqlite3.connect(':memory:')
+        # Sin journal en disco ni fsync: la base de pruebas es desechable
+        cls.real_conn.executescript("PRAGMA journal_mode=MEMORY; PRAGMA synchronous=OFF; PRAGMA temp_store=MEMORY;")
+        cls.cursor = cls.real_conn.cursor()
         
         # 2. Crear esquema
-        self.cursor.execute('''
+        cls.cursor.execute('''
             CREATE TABLE IF NOT EXISTS materials (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT NOT NULL UNIQUE,
@@ -52,27 +61,38 @@ class TestDatabase(unittest.TestCase):
                 max_temp REAL
             )
         ''')
-        self.real_conn.commit()
+        cls.real_conn.commit()
         
         # 3. Crear el objeto "inmortal" que usará el código
-        self.safe_conn = UnclosableConnection(self.real_conn)
+        cls.safe_conn = UnclosableConnection(cls.real_conn)
 
-    def tearDown(self):
-        # Cerrar la conexión real manualmente al final del test
-        self.real_conn.close()
+    @classmethod
+    def tearDownClass(cls):
+        # Cerrar la conexión real manualmente al final de la clase
+        cls.real_conn.close()
+
+    def setUp(self):
+        # Cada test parte de la tabla vacía (el esquema ya existe)
+        self.real_conn.execute("DELETE FROM materials")
+        self.real_conn.commit()
+        # Aislar el estado global de database_mgr (se restaura al terminar cada test):
+        # - _INITIALIZED: el esquema ya está creado, init_db no debe sembrar el CSV en la base
+        #   de prueba sin importar qué tests corrieron antes.
+        # - _CONN: cada test abre su propia conexión cacheada (la real sigue abierta hasta
+        #   tearDownClass) y no hereda ni deja la de otro test o de la aplicación.
+        patcher = patch.multiple(database_mgr, _INITIALIZED=True, _CONN=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
 
     @patch('sqlite3.connect')
     def test_insert_valid_material(self, mock_connect):
         # El mock devuelve nuestra conexión protegida
         mock_connect.return_value = self.safe_conn
         
-        data = {
-            'name': ['Vibranium'],
-            'category': ['Metal'],
-            'elastic_modulus': [500000],
-            'yield_strength': [1000]
-        }
-        df = pd.DataFrame(data)
+        df = pd.DataFrame.from_records(
+            [('Vibranium', 'Metal', 500000.0, 1000.0)],
+            columns=['name', 'category', 'elastic_modulus', 'yield_strength']
+        )
         
         added, ignored, error = database_mgr.insert_from_dataframe(df)
         
@@ -89,16 +109,113 @@ class TestDatabase(unittest.TestCase):
         mock_connect.return_value = self.safe_conn
         
         # Insertar primero
-        self.cursor.execute("INSERT INTO materials (name, category, elastic_modulus, yield_strength) VALUES ('Adamantium', 'Metal', 1, 1)")
+        self.cursor.executemany(
+            "INSERT INTO materials (name, category, elastic_modulus, yield_strength) VALUES (?, ?, ?, ?)",
+            [('Adamantium', 'Metal', 1, 1)]
+        )
         self.real_conn.commit()
         
         # Intentar duplicar
-        df = pd.DataFrame({'name': ['Adamantium'], 'category': ['Metal'], 'elastic_modulus': [1], 'yield_strength': [1]})
+        added, ignored, error = database_mgr.insert_from_dataframe(_DUP_DF)
+        
+        self.assertEqual(added, 0)
+        self.assertEqual(ignored, 1)
+
+    @patch('sqlite3.connect')
+    def test_insert_batch_with_duplicates(self, mock_connect):
+        mock_connect.return_value = self.safe_conn
+        
+        self.cursor.executemany(
+            "INSERT INTO materials (name, category, elastic_modulus, yield_strength) VALUES (?, ?, ?, ?)",
+            [('Mithril', 'Metal', 1, 1)]
+        )
+        self.real_conn.commit()
+        
+        # Lote mixto: uno existente, uno repetido dentro del archivo y dos nuevos
+        df = pd.DataFrame({
+            'name': ['Mithril', 'Oricalco', 'Oricalco', 'Beskar'],
+            'category': ['Metal'] * 4,
+            'elastic_modulus': [1, 2, 2, 3],
+            'yield_strength': [1, 2, 2, 3],
+            'ultimate_strength': [None, 5, 5, None]
+        })
         
         added, ignored, error = database_mgr.insert_from_dataframe(df)
         
+        self.assertIsNone(error)
+        self.assertEqual(added, 2)
+        self.assertEqual(ignored, 2)
+        
+        curr = self.real_conn.cursor()
+        curr.execute("SELECT ultimate_strength, poisson_ratio FROM materials WHERE name='Beskar'")
+        self.assertEqual(curr.fetchone(), (None, None))
+
+    @patch('sqlite3.connect')
+    def test_insert_from_records(self, mock_connect):
+        mock_connect.return_value = self.safe_conn
+        
+        # Tuplas planas, columnas en otro orden que el esquema y sin las opcionales
+        added, ignored, error = database_mgr.insert_from_records(
+            [('Metal', 'Vibranium', 500000, '1000'), ('Metal', 'Vibranium', 1, 1)],
+            ['category', 'name', 'elastic_modulus', 'yield_strength']
+        )
+        
+        self.assertIsNone(error)
+        self.assertEqual((added, ignored), (1, 1))
+        curr = self.real_conn.execute("SELECT category, yield_strength, poisson_ratio FROM materials WHERE name='Vibranium'")
+        self.assertEqual(curr.fetchone(), ('Metal', 1000.0, None))
+        
+        _, _, error = database_mgr.insert_from_records([('X', 'Metal')], ['name', 'category'])
+        self.assertTrue(error.startswith("Falta columna"))
+        
+        # Una fila incompleta se informa como error, sin insertar el lote
+        added, _, error = database_mgr.insert_from_records(
+            [('Y', 'Metal', 1, 1), ('Z', 'Metal', 1)],
+            ['name', 'category', 'elastic_modulus', 'yield_strength']
+        )
         self.assertEqual(added, 0)
-        self.assertEqual(ignored, 1)
+        self.assertTrue(error.startswith("Fila 2"))
+
+    @patch('sqlite3.connect')
+    def test_insert_bulk_transaction(self, mock_connect):
+        mock_connect.return_value = self.safe_conn
+        
+        n = 10000
+        df = pd.DataFrame({
+            'name': [f"M{i}" for i in range(n)],
+            'category': ['Metal'] * n,
+            'elastic_modulus': [1.0] * n,
+            'yield_strength': [1.0] * n
+        })
+        
+        # Todo el lote debe viajar en una sola transacción (un único BEGIN)
+        statements = []
+        self.real_conn.set_trace_callback(statements.append)
+        try:
+            added, ignored, error = database_mgr.insert_from_dataframe(df)
+        finally:
+            self.real_conn.set_trace_callback(None)
+        
+        self.assertIsNone(error)
+        self.assertEqual(added, n)
+        self.assertEqual(ignored, 0)
+        self.assertEqual(sum(s.startswith('BEGIN') for s in statements), 1)
+        self.assertEqual(self.real_conn.execute("SELECT count(*) FROM materials").fetchone()[0], n)
+
+    @patch('sqlite3.connect')
+    def test_filter_by_category(self, mock_connect):
+        mock_connect.return_value = self.safe_conn
+        
+        self.cursor.executemany(
+            "INSERT INTO materials (name, category, elastic_modulus, yield_strength) VALUES (?, ?, 1, 1)",
+            [('Titanio', 'Metal'), ('Nylon', 'Polimero'), ('Alumina', 'Ceramico')]
+        )
+        self.real_conn.commit()
+        
+        df = database_mgr.get_materials_by_category(['Metal', 'Ceramico'])
+        
+        self.assertEqual(sorted(df['name']), ['Alumina', 'Titanio'])
+        self.assertEqual(database_mgr.get_categories(), ['Ceramico', 'Metal', 'Polimero'])
 
     @patch('sqlite3.connect')
     def test_missing_columns(self, mock_connect):
@@ -107,7 +224,17 @@ class TestDatabase(unittest.TestCase):
         df = pd.DataFrame({'name': ['MalaData'], 'elastic_modulus': [100]})
         added, ignored, error = database_mgr.insert_from_dataframe(df)
         
-        self.assertIn("Falta columna", str(error))
+        self.assertTrue(error.startswith("Falta columna"))
+        self.assertEqual(added, 0)
+
+    @patch('sqlite3.connect')
+    def test_invalid_numeric_data(self, mock_connect):
+        mock_connect.return_value = self.safe_conn
+        
+        df = pd.DataFrame({'name': ['Unobtainium'], 'category': ['Metal'], 'elastic_modulus': ['muy alto'], 'yield_strength': [1]})
+        added, ignored, error = database_mgr.insert_from_dataframe(df)
+        
+        self.assertTrue(error.startswith("Datos numéricos"))
         self.assertEqual(added, 0)
 
 if __name__ == '__main__':